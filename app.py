@@ -1,182 +1,431 @@
-from flask import Flask, render_template, request, Response
-from flask.json import jsonify
-import json
+from flask import Flask, g, render_template, request, Response
+import logging
+import os
+import queue
 import sqlite3
+import threading
 import time
 
 # added packages
 from cerberus import Validator
+import orjson
 from sqlite3 import Error
-import numpy as np
-from flask import g
 
 app = Flask(__name__)
 
-# Setup the SQLite DB
-conn = sqlite3.connect('database.db')
-conn.execute('CREATE TABLE IF NOT EXISTS readings (device_uuid TEXT, type TEXT, value INTEGER, date_created INTEGER)')
-conn.close()
+# Module logger, the level is read from the environment so production can run at WARNING and above
+log = logging.getLogger(__name__)
+log.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
 
+# Database to use instead of the default files, either a file path or a sqlite URI eg. a shared in-memory database
+DATABASE_URI = os.environ.get('SENSOR_DB_URI')
 
-def get_db():
+# Connection tuning applied whenever a connection is opened. WAL lets readers proceed while a write is in progress and
+# with synchronous=NORMAL a commit needs a single fsync
+DB_PRAGMAS = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-65536; ' \
+             'PRAGMA temp_store=MEMORY; PRAGMA mmap_size=268435456;'
+# Read-only connections can't change the journal mode, they pick up WAL from the database file
+READ_ONLY_PRAGMAS = 'PRAGMA query_only=1; PRAGMA cache_size=-65536; PRAGMA temp_store=MEMORY; ' \
+                    'PRAGMA mmap_size=268435456;'
+
+# Number of prepared statements kept per connection, well above the number of distinct queries the app runs
+STATEMENT_CACHE_SIZE = 512
+
+
+def database_path():
+    """
+    Get the database to connect to depending on the environment ie. production or testing
+    * return -> Database file path or URI
     """
-    Create a DB context if it doesn't already exist and connect to the a database depending on the environment ie.
-    production or testing.
+    if DATABASE_URI:
+        return DATABASE_URI
+    return 'test_database.db' if app.config['TESTING'] else 'database.db'
+
+
+def configure_connection(db, pragmas=DB_PRAGMAS):
+    """
+    Apply the connection PRAGMAs to a freshly opened database connection
+    * db -> Database instance
+    * pragmas -> The PRAGMA statements to run
     * return -> Database instance
     """
-    db = getattr(g, '_database', None)
+    db.executescript(pragmas)
+    return db
+
+
+def connect(path, readonly=False):
+    """
+    Open and configure a database connection. Transactions are managed explicitly with begin/commit and the statement
+    cache is sized to hold every query variant so prepared statements are reused rather than re-parsed. Pooled
+    connections are handed from one request thread to the next, so they aren't bound to the thread that opened them.
+    * path -> Database file path or URI
+    * readonly -> Whether to open the connection read-only
+    * return -> Database instance
+    """
+    uri = path.startswith('file:')
+    if readonly and not uri:
+        path, uri = 'file:{}?mode=ro'.format(path), True
+
+    db = sqlite3.connect(path, uri=uri, check_same_thread=False, isolation_level=None,
+                         cached_statements=STATEMENT_CACHE_SIZE)
+    return configure_connection(db, READ_ONLY_PRAGMAS if readonly else DB_PRAGMAS)
+
+
+def init_db(path=None):
+    """
+    Setup the SQLite DB, creating the readings table and its indexes if they don't exist. The PRAGMAs are applied first
+    so the database file is in WAL mode from the start.
+    * path -> The database file path or URI to initialize, defaults to the environment's database
+    """
+    conn = connect(path or database_path())
+    conn.execute('CREATE TABLE IF NOT EXISTS readings (device_uuid TEXT, type TEXT, value INTEGER, '
+                 'date_created INTEGER)')
+    # Covering indexes so metric queries are served from the index alone. The first handles date range filters, the
+    # second returns values already sorted for min/max and percentile queries
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_readings_dev_type_date ON readings (device_uuid, type, date_created, '
+                 'value)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_readings_dev_type_val ON readings (device_uuid, type, value)')
+    # Gather table statistics so the query planner picks the indexes above
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """
+    Create the readings table and indexes, run via `flask init-db` before `flask run`
+    """
+    init_db()
+
+
+# Open connections are pooled and reused across requests so their page cache stays warm. The development server
+# starts a new thread for every request, so a connection is checked out of its pool for the duration of a request
+# rather than being tied to a thread. There is a pool per database and access mode
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Number of idle connections kept per pool, set it to the number of WSGI worker threads. Connections returned to a
+# full pool are closed, so a burst of concurrent requests doesn't leave its connections open for good
+POOL_SIZE = int(os.environ.get('SENSOR_DB_POOL_SIZE', 8))
+
+
+def connection_pool(path, readonly):
+    """
+    Get the pool of idle connections to a database, creating it if it doesn't already exist
+    * path -> Database file path or URI
+    * readonly -> Whether the pool holds read-only connections
+    * return -> Queue instance
+    """
+    pool = _pools.get((path, readonly))
+    if pool is None:
+        # Check again under the lock so concurrent requests always end up sharing the same pool
+        with _pools_lock:
+            pool = _pools.get((path, readonly))
+            if pool is None:
+                pool = _pools[(path, readonly)] = queue.Queue(POOL_SIZE)
+    return pool
+
+
+def release_connection(key, db, exception=None):
+    """
+    Return a checked out connection to its pool, rolling back any transaction left open. The connection is closed
+    if the pool is already full.
+    * key -> (path, readonly) of the pool the connection belongs to
+    * db -> Database instance
+    * exception -> The exception that ended the request, if any
+    """
+    if db.in_transaction:
+        log.debug('Rolling back open transaction after request, exception: %s', exception)
+        db.rollback()
+
+    try:
+        connection_pool(*key).put_nowait(db)
+    except queue.Full:
+        db.close()
+
+
+def get_db(readonly=False):
+    """
+    Get a connection to the environment's database for the current request, checking one out of the pool or opening
+    a new one if the pool is empty. Read-only connections never take the write lock, so GET requests don't wait on
+    POST transactions.
+    * readonly -> Whether to get a read-only connection
+    * return -> Database instance
+    """
+    key = (database_path(), readonly)
+
+    checked_out = g.setdefault('connections', {})
+    db = checked_out.get(key)
     if db is None:
-        db = g._database = sqlite3.connect('test_database.db' if app.config['TESTING'] else 'database.db')
+        try:
+            db = connection_pool(*key).get_nowait()
+        except queue.Empty:
+            db = connect(*key)
+
+            # Enable row factory to make responses more malleable
+            db.row_factory = sqlite3.Row
+        checked_out[key] = db
+    return db
 
-        # Enable row factory to make responses more malleable
-        db.row_factory = sqlite3.Row
-        return db
 
-# Terminate db connection when application exits
-@app.teardown_appcontext
+# Return db connections to the pool when a request ends. This is a request teardown rather than an app context one,
+# requests reuse an app context that is already pushed so its teardown doesn't run for every request
+@app.teardown_request
 def close_connection(exception):
-    db = getattr(g, '_database', None)
-    if db is not None:
-        print(exception)
-        db.close()
+    for key, db in g.pop('connections', {}).items():
+        release_connection(key, db, exception)
+
+
+# Number of rows fetched from a cursor at a time when streaming list responses
+FETCH_SIZE = 1000
 
+# Keys of the JSON objects returned by the endpoints, in column order
+READING_KEYS = ('device_uuid', 'type', 'value', 'date_created')
+SUMMARY_KEYS = ('device_uuid', 'number_of_readings', 'max_reading_value', 'mean_reading_value', 'quartile_1_value',
+                'quartile_3_value', 'median_value', 'device_type')
+STATS_KEYS = ('number_of_readings', 'min_reading_value', 'max_reading_value', 'mean_reading_value', 'median_value',
+              'quartile_1_value', 'quartile_3_value')
 
-# Percentile helper class
-class Percentile(object):
+
+def json_response(cur, keys, status=200):
+    """
+    Stream the rows of an executed query as a JSON array of objects. Rows are fetched and encoded in chunks while the
+    response is sent, so memory use doesn't grow with the number of rows.
+    * cur -> Cursor of the executed query
+    * keys -> The object key for each column of a row
+    * status -> The response status code
+    * return -> Response instance
+    """
+    def generate():
+        yield b'['
+        separator = b''
+        rows = cur.fetchmany(FETCH_SIZE)
+        while rows:
+            # Strip the brackets of each encoded chunk so they join into a single array
+            yield separator + orjson.dumps([dict(zip(keys, row)) for row in rows])[1:-1]
+            separator = b','
+            rows = cur.fetchmany(FETCH_SIZE)
+        yield b']'
+
+    response = Response(generate(), status=status, mimetype='application/json')
+
+    # The body is sent after the request teardown has run, so the cursor's connection is taken out of the request's
+    # checked out connections and only returned to the pool once the response is closed
+    checked_out = g.get('connections', {})
+    key = next(key for key, db in checked_out.items() if db is cur.connection)
+    db = checked_out.pop(key)
+
+    def release():
+        # Reset the cursor's statement first, a client that disconnects mid-stream leaves it unfinished
+        cur.close()
+        release_connection(key, db)
+
+    response.call_on_close(release)
+    return response
+
+
+# Schema of a posted sensor reading
+WRITE_SCHEMA = {"type": {'type': 'string'}, 'value': {'type': 'integer', 'min': 0, 'max': 100}}
+
+# Validators hold the document being validated as state, so like connections each request checks a compiled instance
+# out of a pool and returns it when the request ends
+_write_validators = queue.Queue()
+
+
+def get_write_validator():
     """
-    Passed as a user function to sqlite and used in calculating median, and 1st, and 3rd quartiles
+    Get a validator for posted readings for the current request, checking one out of the pool or creating it if the
+    pool is empty
+    * return -> Validator instance
     """
-    def __init__(self):
-        self.arr = []
-        self.percentile = ""
+    validator = g.get('write_validator')
+    if validator is None:
+        try:
+            validator = _write_validators.get_nowait()
+        except queue.Empty:
+            validator = Validator(WRITE_SCHEMA)
+        g.write_validator = validator
+    return validator
 
-    def step(self, value, per):
-        self.arr.append(value)
-        self.percentile = per
 
-    def finalize(self):
-        return np.nanpercentile(self.arr, self.percentile, interpolation='midpoint')
+# Return the validator to the pool when a request ends
+@app.teardown_request
+def release_write_validator(exception):
+    validator = g.pop('write_validator', None)
+    if validator is not None:
+        _write_validators.put(validator)
 
 
-# Build sql query string
-def metric_query_builder(sensor_type, query_template, start=None, end=None):
+def fast_validate_reading(reading):
     """
-    Build sql query string with available conditional parameters
-    * sensor_type -> The type of sensor value a client is looking for
-    * start -> The epoch start time from which to begin search
-    * end -> The epoch end time to stop search
-    * return -> (query_template, params)
+    Cheap check for the common shape of a posted reading ie. exactly a string type and an integer value within range.
+    Readings failing it are passed on to the full schema validator, so it may reject valid input but never accept
+    invalid input.
+    * reading -> The posted reading
+    * return -> True if the reading is valid
     """
+    if type(reading) is not dict or len(reading) != 2:
+        return False
+
+    value = reading.get('value')
+    return type(reading.get('type')) is str and type(value) is int and 0 <= value <= 100
 
-    # Initialize params list
-    params = [sensor_type]
-    # conditionally append where clauses to query template
-    if start is not None:
-        params.append(start)
-        query_template += "and date_created >= ?"
-    if end is not None:
-        params.append(end)
-        query_template += "and date_created <= ?"
 
-    # Return query and params tuple
-    return query_template, tuple(params)
+# Percentile query templates
+# Percentiles are computed with midpoint interpolation: for a sorted set of n values and a fraction k/4 the result is
+# the mean of the values at the floor and ceiling of the 0-based position k * (n - 1) / 4. The readings are ranked
+# with window functions so the sort and aggregation both run inside SQLite.
+PERCENTILE_CTE = "with ranked as (select value, row_number() over (order by value) - 1 as idx, " \
+                 "count(*) over () as n from ({})) "
+
+
+def quartile_expression(k):
+    """
+    Build a sql expression returning the k-th quartile (k/4 percentile) of the values ranked by PERCENTILE_CTE
+    * k -> The quartile to compute ie. 1, 2 (median) or 3
+    * return -> sql expression string to be used inside a select clause
+    """
+    return "avg(case when idx in ({k} * (n - 1) / 4, ({k} * (n - 1) + 3) / 4) then value end)".format(k=k)
+
+
+# Build every variant of a sql query string
+def query_variants(query_template, conditions):
+    """
+    Build the sql query string for every combination of optional where conditions, so queries are assembled once at
+    import time rather than on each request
+    * query_template -> The query with a '{}' placeholder where the optional conditions are inserted
+    * conditions -> The optional where conditions, in the same order as their parameters
+    * return -> dict mapping a bitmask of the conditions in use to the query string
+    """
+    variants = {}
+    for mask in range(1 << len(conditions)):
+        clauses = ''.join(' and ' + condition for i, condition in enumerate(conditions) if mask & (1 << i))
+        variants[mask] = query_template.format(clauses)
+    return variants
+
+
+def select_query(queries, params, *optional_params):
+    """
+    Pick the query variant matching the optional parameters that were supplied
+    * queries -> The query variants built by query_variants
+    * params -> The mandatory query parameters
+    * optional_params -> The optional query parameters, None when not supplied
+    * return -> (query, params)
+    """
+    mask = 0
+    for i, param in enumerate(optional_params):
+        if param is not None:
+            mask |= 1 << i
+            params += (param,)
+
+    return queries[mask], params
+
+
+# Query templates, every sql string the endpoints execute is a module-level constant
+INSERT_READING_QUERY = 'insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)'
+
+# Optional where conditions on the readings endpoints
+DATE_CONDITIONS = ('date_created >= ?', 'date_created <= ?')
+READING_CONDITIONS = ('type = ?',) + DATE_CONDITIONS
+
+# Readings of a sensor type for a device, used as the source of the metric queries. The value column is nullable,
+# readings without a value are left out so they aren't ranked like min/max/avg already skip them
+METRIC_READINGS = 'select value from readings where device_uuid=? and type=? and value is not null{}'
+
+READINGS_QUERIES = query_variants('select * from readings where device_uuid=?{}', READING_CONDITIONS)
+MAX_QUERIES = query_variants('select max(value) as value from readings where device_uuid=? and type=?{}',
+                             DATE_CONDITIONS)
+MIN_QUERIES = query_variants('select min(value) as value from readings where device_uuid=? and type=?{}',
+                             DATE_CONDITIONS)
+MEAN_QUERIES = query_variants('select round(avg(value),2) as value from readings where device_uuid=? and type=?{}',
+                              DATE_CONDITIONS)
+MODE_QUERIES = query_variants('select value as value, count(*) as occurrences from readings where device_uuid=? and '
+                              'type=?{} group by value order by occurrences desc limit 1', DATE_CONDITIONS)
+MEDIAN_QUERIES = query_variants(PERCENTILE_CTE.format(METRIC_READINGS) +
+                                'select {} as value from ranked'.format(quartile_expression(2)), DATE_CONDITIONS)
+QUARTILE_QUERIES = query_variants(PERCENTILE_CTE.format(METRIC_READINGS) +
+                                  'select {} as quartile_1, {} as quartile_3 from ranked'.format(
+                                      quartile_expression(1), quartile_expression(3)), DATE_CONDITIONS)
+STATS_QUERIES = query_variants(PERCENTILE_CTE.format(METRIC_READINGS) +
+                               'select count(*) as number_of_readings, min(value) as min_reading_value, '
+                               'max(value) as max_reading_value, round(avg(value),2) as mean_reading_value, '
+                               '{} as median_value, {} as quartile_1_value, {} as quartile_3_value from ranked'.format(
+                                   quartile_expression(2), quartile_expression(1), quartile_expression(3)),
+                               DATE_CONDITIONS)
+
+SUMMARY_QUERY = "with ranked as (select device_uuid, type, value, row_number() over " \
+                "(partition by device_uuid, type order by value) - 1 as idx, count(*) over " \
+                "(partition by device_uuid, type) as n from readings where value is not null) " \
+                "select device_uuid, count(*) as number_of_readings, max(value) as max_reading_value, " \
+                "round(avg(value),2) as mean_reading_value, {} as quartile_1_value, " \
+                "{} as quartile_3_value, {} as median_value, type as device_type from ranked " \
+                "group by device_uuid, type order by count(device_uuid) desc".format(
+                    quartile_expression(1), quartile_expression(3), quartile_expression(2))
 
 
 @app.route('/devices/<string:device_uuid>/readings/', methods=['POST', 'GET'])
 def request_device_readings(device_uuid):
     # Get the db and cursor objects
-    db = get_db()
+    db = get_db(readonly=request.method == 'GET')
     cur = db.cursor()
 
     if request.method == 'POST':
-        # Grab the post parameters
-        post_data = json.loads(request.data)
+        # Grab the post parameters, invalid JSON is treated as invalid input
+        post_data = request.get_json(force=True, silent=True)
 
-        # Validate post parameters
-        write_schema = {"type": {'type': 'string'}, 'value': {'type': 'integer', 'min': 0, 'max': 100}}
+        # Accept either a single reading or a list of readings
+        readings = post_data if isinstance(post_data, list) else [post_data]
 
-        v = Validator(write_schema)
-        is_valid = v.validate(post_data)
+        # Validate post parameters, a validator is only checked out when the fast check fails
+        is_valid = len(readings) > 0 and all(
+            fast_validate_reading(reading) or (isinstance(reading, dict) and get_write_validator().validate(reading))
+            for reading in readings)
 
         # return error if validation fails
         if not is_valid:
             return "invalid input", 400
 
         # Extract post parameters
-        sensor_type = post_data.get('type')
-        value = post_data.get('value')
-        date_created = post_data.get('date_created', int(time.time()))
+        now = int(time.time())
+        rows = [(device_uuid, reading.get('type'), reading.get('value'), reading.get('date_created', now))
+                for reading in readings]
 
-        # Insert data into db
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    (device_uuid, sensor_type, value, date_created))
+        # Insert data into db in a single transaction
+        cur.execute('begin')
+        cur.executemany(INSERT_READING_QUERY, rows)
 
         db.commit()
 
         # Return success
         return 'success', 201
     else:
-        # Build sql query string
-        def query_builder(sensor_type, query_template, start=None, end=None):
-            """
-            Build sql query string with available conditional parameters
-            * sensor_type -> The type of sensor value a client is looking for
-            * start -> The epoch start time from which to begin search
-            * end -> The epoch end time to stop search
-            * return -> (query_template, params)
-            """
-
-            # Initialize params list
-            params = []
-            # conditionally append where clauses to query template
-            if sensor_type is not None:
-                params.append(sensor_type)
-                query_template += "and type = ?"
-
-            if start is not None:
-                params.append(start)
-                query_template += "and date_created >= ?"
-            if end is not None:
-                params.append(end)
-                query_template += "and date_created <= ?"
-
-            # Return query and params tuple
-            return query_template, tuple(params)
-
-        # Query template
-        query_template = "select * from readings where device_uuid=?"
-
         # Extract query parameters
         sensor_type = request.args.get('type') or None
         epoch_start = request.args.get('start') or None
         epoch_end = request.args.get('end') or None
 
-        # Build query string
-        get_query, params = query_builder(sensor_type, query_template, epoch_start, epoch_end)
-        params_tuple = (device_uuid,) + params
+        # Pick the query string for the supplied parameters
+        get_query, params_tuple = select_query(READINGS_QUERIES, (device_uuid,), sensor_type, epoch_start, epoch_end)
 
         # Execute the query
         cur.execute(get_query, params_tuple)
-        rows = cur.fetchall()
 
         # Return the JSON
-        return jsonify([dict(zip(['device_uuid', 'type', 'value', 'date_created'], row)) for row in rows]), 200
+        return json_response(cur, READING_KEYS)
 
 
-@app.route('/devices/<string:device_uuid>/readings/max/', methods=['GET'])
-def request_device_readings_max(device_uuid):
+def request_device_metric(device_uuid, queries, keys, metric):
     """
-    This endpoint allows clients to GET the max sensor reading for a device.
-
-    Mandatory Query Parameters:
-    * type -> The type of sensor value a client is looking for
-
-    Optional Query Parameters
-    * start -> The epoch start time for a sensor being created
-    * end -> The epoch end time for a sensor being created
+    Run a metric query over a device's readings of a sensor type and return the resulting row as JSON. Shared by all
+    the metric endpoints.
+    * device_uuid -> The device to compute the metric for
+    * queries -> The query variants built by query_variants
+    * keys -> The JSON key for each column of the resulting row
+    * metric -> The name of the metric, used in error messages
+    * return -> (response, status)
     """
     # Get the db and cursor objects
-    db = get_db()
+    db = get_db(readonly=True)
     cur = db.cursor()
 
     # Extract query parameters
@@ -190,34 +439,33 @@ def request_device_readings_max(device_uuid):
     epoch_start = request.args.get('start')
     epoch_end = request.args.get('end')
 
-    # Make query template
-    max_query_template = 'select max(value) as value from readings where device_uuid=? and type=? '
-
-    # Build sql query string with parameters
-    max_query, params = metric_query_builder(sensor_type, max_query_template, epoch_start, epoch_end)
-    params_tuple = (device_uuid,) + params
+    # Pick the query string for the supplied parameters
+    metric_query, params_tuple = select_query(queries, (device_uuid, sensor_type), epoch_start, epoch_end)
 
     try:
         # Execute the query
-        cur.execute(max_query, params_tuple)
+        cur.execute(metric_query, params_tuple)
         row = cur.fetchone()
 
-        if row is None:
-            return {"value": "Null"}, 200
+        # handle empty responses, aggregates return a row of nulls rather than no row when nothing matches
+        if row is None or row[0] is None:
+            return dict.fromkeys(keys), 200
         else:
             # Return the JSON
-            return dict(zip(['value'], row)), 200
+            return dict(zip(keys, row)), 200
 
     except Error as err:
-        print(err)
+        log.error('Error getting %s value: %s', metric, err)
         # Return error message
-        return "Error getting max value", 500
+        return "Error getting {} value".format(metric), 500
 
 
-@app.route('/devices/<string:device_uuid>/readings/min/', methods=['GET'])
-def request_device_readings_min(device_uuid):
+@app.route('/devices/<string:device_uuid>/readings/stats/', methods=['GET'])
+def request_device_readings_stats(device_uuid):
     """
-    This endpoint allows clients to GET the min sensor reading for a device.
+    This endpoint allows clients to GET the number of readings, min, max, mean, median, and 1st and 3rd quartiles of a
+    device's sensor readings at once. All values are computed in a single pass over the readings, so this is the
+    preferred endpoint when more than one of them is needed.
 
     Mandatory Query Parameters:
     * type -> The type of sensor value a client is looking for
@@ -226,44 +474,37 @@ def request_device_readings_min(device_uuid):
     * start -> The epoch start time for a sensor being created
     * end -> The epoch end time for a sensor being created
     """
-    # Get the db and cursor objects
-    db = get_db()
-    cur = db.cursor()
+    return request_device_metric(device_uuid, STATS_QUERIES, STATS_KEYS, 'stats')
 
-    # Extract query parameters
-    sensor_type = request.args.get('type')
 
-    # Check for sensor type
-    if sensor_type is None:
-        return "sensor type is required", 400
+@app.route('/devices/<string:device_uuid>/readings/max/', methods=['GET'])
+def request_device_readings_max(device_uuid):
+    """
+    This endpoint allows clients to GET the max sensor reading for a device.
 
-    # Extract optional query parameters
-    epoch_start = request.args.get('start')
-    epoch_end = request.args.get('end')
+    Mandatory Query Parameters:
+    * type -> The type of sensor value a client is looking for
 
-    # Make query template
-    min_query_template = 'select min(value) as value from readings where device_uuid=? and type=? '
+    Optional Query Parameters
+    * start -> The epoch start time for a sensor being created
+    * end -> The epoch end time for a sensor being created
+    """
+    return request_device_metric(device_uuid, MAX_QUERIES, ('value',), 'max')
 
-    # Build sql query string with parameters
-    min_query, params = metric_query_builder(sensor_type, min_query_template, epoch_start, epoch_end)
-    params_tuple = (device_uuid,) + params
 
-    try:
-        # Execute the query
-        cur.execute(min_query, params_tuple)
-        row = cur.fetchone()
+@app.route('/devices/<string:device_uuid>/readings/min/', methods=['GET'])
+def request_device_readings_min(device_uuid):
+    """
+    This endpoint allows clients to GET the min sensor reading for a device.
 
-        # handle empty responses
-        if row is None:
-            return {"value": "null"}, 200
-        else:
-            # Return the JSON
-            return dict(zip(['value'], row)), 200
+    Mandatory Query Parameters:
+    * type -> The type of sensor value a client is looking for
 
-    except Error as err:
-        print(err)
-        # Return error message
-        return "Error getting min value", 500
+    Optional Query Parameters
+    * start -> The epoch start time for a sensor being created
+    * end -> The epoch end time for a sensor being created
+    """
+    return request_device_metric(device_uuid, MIN_QUERIES, ('value',), 'min')
 
 
 @app.route('/devices/<string:device_uuid>/readings/median/', methods=['GET'])
@@ -278,48 +519,7 @@ def request_device_readings_median(device_uuid):
     * start -> The epoch start time for a sensor being created
     * end -> The epoch end time for a sensor being created
     """
-    # Get the db and cursor objects
-    db = get_db()
-    cur = db.cursor()
-
-    # Register percentile helper function
-    db.create_aggregate("percentile", 2, Percentile)
-
-    # Extract mandatory query parameter
-    sensor_type = request.args.get('type')
-
-    # Check for sensor type
-    if sensor_type is None:
-        return "sensor type is required", 400
-
-    # Extract optional query parameters
-    epoch_start = request.args.get('start')
-    epoch_end = request.args.get('end')
-
-    # Make query template
-    median_query_template = 'select percentile(value, 50) as value from readings where device_uuid=? and type=? '
-
-    # Build sql query string with parameters
-    median_query, params = metric_query_builder(sensor_type, median_query_template, epoch_start, epoch_end)
-
-    params_tuple = (device_uuid,) + params
-
-    try:
-        # Execute the query
-        cur.execute(median_query, params_tuple)
-        row = cur.fetchone()
-
-        # handle empty responses
-        if row is None:
-            return {"value": "null"}, 200
-        else:
-            # Return the JSON
-            return dict(zip(['value'], row)), 200
-
-    except Error as err:
-        print(err)
-        # Return error message
-        return "Error getting max value", 500
+    return request_device_metric(device_uuid, MEDIAN_QUERIES, ('value',), 'median')
 
 
 @app.route('/devices/<string:device_uuid>/readings/mean/', methods=['GET'])
@@ -334,45 +534,7 @@ def request_device_readings_mean(device_uuid):
     * start -> The epoch start time for a sensor being created
     * end -> The epoch end time for a sensor being created
     """
-    # Get the db and cursor objects
-    db = get_db()
-    cur = db.cursor()
-
-    # Extract query parameters
-    sensor_type = request.args.get('type')
-
-    # Check for sensor type
-    if sensor_type is None:
-        return "sensor type is required", 400
-
-    # Extract optional query parameters
-    epoch_start = request.args.get('start')
-    epoch_end = request.args.get('end')
-
-    # Make query template
-    mean_query_template = 'select round(avg(value),2) as value from readings where device_uuid=? and type=? '
-
-    # Build sql query string with parameters
-    mean_query, params = metric_query_builder(sensor_type, mean_query_template, epoch_start, epoch_end)
-
-    params_tuple = (device_uuid,) + params
-
-    try:
-        # Execute the query
-        cur.execute(mean_query, params_tuple)
-        row = cur.fetchone()
-
-        # handle empty responses
-        if row is None:
-            return {"value": "null"}, 200
-        else:
-            # Return the JSON
-            return dict(zip(['value'], row)), 200
-
-    except Error as err:
-        print(err)
-        # Return error message
-        return "Error getting mean value", 500
+    return request_device_metric(device_uuid, MEAN_QUERIES, ('value',), 'mean')
 
 
 @app.route('/devices/<string:device_uuid>/readings/mode/', methods=['GET'])
@@ -387,46 +549,7 @@ def request_device_readings_mode(device_uuid):
     * start -> The epoch start time for a sensor being created
     * end -> The epoch end time for a sensor being created
     """
-    # Get the db and cursor objects
-    db = get_db()
-    cur = db.cursor()
-
-    # Extract query parameters
-    sensor_type = request.args.get('type')
-
-    # Check for sensor type
-    if sensor_type is None:
-        return "sensor type is required", 400
-
-    # Extract optional query parameters
-    epoch_start = request.args.get('start')
-    epoch_end = request.args.get('end')
-
-    # Make query template
-    mode_query_template = 'select value as value from readings where device_uuid=? and type=? '
-
-    # Build sql query string with parameters
-    mode_query, params = metric_query_builder(sensor_type, mode_query_template, epoch_start, epoch_end)
-
-    params_tuple = (device_uuid,) + params
-
-    print(mode_query + 'group by value, order by count(*) desc limit 1', params_tuple)
-    try:
-        # Execute the query
-        cur.execute(mode_query + 'group by value order by count(*) desc', params_tuple)
-        row = cur.fetchone()
-
-        # handle empty responses
-        if row is None:
-            return {"value": "null"}, 200
-        else:
-            # Return the JSON
-            return dict(zip(['value'], row)), 200
-
-    except Error as err:
-        print(err)
-        # Return error message
-        return "Error getting mode value", 500
+    return request_device_metric(device_uuid, MODE_QUERIES, ('value',), 'mode')
 
 
 @app.route('/devices/<string:device_uuid>/readings/quartiles/', methods=['GET'])
@@ -441,74 +564,27 @@ def request_device_readings_quartiles(device_uuid):
     * start -> The epoch start time for a sensor being created
     * end -> The epoch end time for a sensor being created
     """
-    # Get the db and cursor objects
-    db = get_db()
-    cur = db.cursor()
-
-    # Register percentile helper function
-    db.create_aggregate("percentile", 2, Percentile)
-
-    # Extract query parameters
-    sensor_type = request.args.get('type')
-
-    # Check for sensor type
-    if sensor_type is None:
-        return "sensor type is required", 400
-
-    # Extract optional query parameters
-    epoch_start = request.args.get('start')
-    epoch_end = request.args.get('end')
-
-    # Make query template
-    quartile_query_template = 'select percentile(value, 25) as quartile_1, percentile(value, 75) as quartile_3 from ' \
-                              'readings where device_uuid=? and type=? '
-
-    # Build sql query string with parameters
-    quartile_query, params = metric_query_builder(sensor_type, quartile_query_template, epoch_start, epoch_end)
-
-    params_tuple = (device_uuid,) + params
-    try:
-        # Execute the query
-        cur.execute(quartile_query, params_tuple)
-        row = cur.fetchone()
-
-        # Return the JSON
-        return dict(zip(['quartile_1', 'quartile_3'], row)), 200
-
-    except Error as err:
-        print(err)
-        # Return error message
-        return "Error getting max value", 500
+    return request_device_metric(device_uuid, QUARTILE_QUERIES, ('quartile_1', 'quartile_3'), 'quartiles')
 
 
 @app.route('/devices/summary/', methods=['GET'])
 def request_device_summary():
     # Get the db and cursor objects
-    db = get_db()
+    db = get_db(readonly=True)
     cur = db.cursor()
 
-    # Register percentile helper function
-    db.create_aggregate("percentile", 2, Percentile)
-
-    # Query template
-    query_template = "select device_uuid, count(*) as number_of_readings, max(value) as max_reading_value, " \
-                     "round(avg(value),2) as mean_reading_value, percentile(value, 25) as  quartile_1_value," \
-                     "percentile(value, 75) as quartile_3_value, percentile(value, 50) as median_value, " \
-                     "type as device_type from readings group by device_uuid, type order by count(device_uuid) desc"
-
     try:
         # Execute the query
-        cur.execute(query_template)
-        rows = cur.fetchall()
+        cur.execute(SUMMARY_QUERY)
 
         # Return the JSON
-        return jsonify([dict(zip(['device_uuid', 'number_of_readings', 'max_reading_value', 'mean_reading_value',
-                                  'quartile_1_value', 'quartile_3_value', 'median_value', 'device_type'], row)) for row
-                        in rows]), 200
-    except Error:
+        return json_response(cur, SUMMARY_KEYS)
+    except Error as err:
+        log.error('Error getting device summary: %s', err)
         # Return error message
-        return "Error getting max value", 500
+        return "Error getting device summary", 500
 
 
 if __name__ == '__main__':
+    init_db()
     app.run()
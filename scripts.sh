@@ -11,6 +11,8 @@ export FLASK_ENV=$FLASK_ENV
 # perform action
 if [ "$ACTION" = "run" ]
 then
+  echo "initializing database"
+  flask init-db
   echo "starting flask app"
   flask run
 fi
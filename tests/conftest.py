@@ -0,0 +1,89 @@
+import os
+import pytest
+import sqlite3
+import time
+from collections import namedtuple
+
+from .constants import DEVICE_UUID, MODE_DEVICE_UUID, QUARTILES_DEVICE_UUID, TEST_DB_URI
+
+# Run the tests against the shared in-memory database. It has to be set before the app is imported
+os.environ['SENSOR_DB_URI'] = TEST_DB_URI
+
+from app import app, init_db
+
+# Tests would usually take variable amounts of time to run, so saving a time anchor will come
+# handy while testing endpoints requiring time ranges
+TimeAnchors = namedtuple('TimeAnchors', ['time_anchor', 'time_anchor_1', 'time_anchor_2'])
+
+
+@pytest.fixture(scope='session')
+def anchors():
+    # Create time anchors
+    return TimeAnchors(int(time.time()) - 100, int(time.time()) - 50, int(time.time()))
+
+
+@pytest.fixture(scope='session')
+def seeded_db(anchors):
+    # Setup the SQLite DB once for the whole session. The in-memory database starts out empty and lives as long as
+    # this connection is open
+    # The connection runs in autocommit mode, the seed insert gets an explicit transaction below
+    conn = sqlite3.connect(TEST_DB_URI, uri=True, isolation_level=None)
+    # Configure the connection and create the schema in one script. The connection shares its page cache with the
+    # app's connections, read_uncommitted lets it check the app's writes without waiting on shared cache table locks.
+    # locking_mode=EXCLUSIVE is left out, it would lock the app's connections out of the database
+    conn.executescript('''
+        PRAGMA journal_mode=MEMORY;
+        PRAGMA synchronous=OFF;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-20000;
+        PRAGMA read_uncommitted=1;
+        CREATE TABLE IF NOT EXISTS readings (device_uuid TEXT, type TEXT, value INTEGER, date_created INTEGER);
+    ''')
+
+    # Setup some sensor data
+    seed_readings = [
+        (DEVICE_UUID, 'temperature', 22, anchors.time_anchor),
+        (DEVICE_UUID, 'temperature', 50, anchors.time_anchor_1),
+        (DEVICE_UUID, 'humidity', 50, anchors.time_anchor_1),
+        (DEVICE_UUID, 'temperature', 100, anchors.time_anchor_2),
+        ('other_uuid', 'temperature', 22, anchors.time_anchor_2),
+        # The base readings plus a second 22 to create a clear mode
+        (MODE_DEVICE_UUID, 'temperature', 22, anchors.time_anchor - 20),
+        (MODE_DEVICE_UUID, 'temperature', 22, anchors.time_anchor),
+        (MODE_DEVICE_UUID, 'temperature', 50, anchors.time_anchor_1),
+        (MODE_DEVICE_UUID, 'temperature', 100, anchors.time_anchor_2),
+        # The base readings plus a 75 for an even number of readings
+        (QUARTILES_DEVICE_UUID, 'temperature', 22, anchors.time_anchor),
+        (QUARTILES_DEVICE_UUID, 'temperature', 75, anchors.time_anchor),
+        (QUARTILES_DEVICE_UUID, 'temperature', 50, anchors.time_anchor_1),
+        (QUARTILES_DEVICE_UUID, 'temperature', 100, anchors.time_anchor_2),
+    ]
+    # Insert all seed readings in a single transaction
+    conn.execute('begin immediate')
+    conn.executemany('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)', seed_readings)
+    conn.execute('commit')
+
+    # Create the app's indexes on readings, after the seed data so they are built in one pass
+    init_db(TEST_DB_URI)
+
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def conn(seeded_db):
+    # Readings inserted during a test get a higher rowid than the existing ones, so removing them afterwards reverts
+    # whatever the test added through the API or directly and the next test starts from the seed data
+    seed_rowid = seeded_db.execute('select max(rowid) from readings').fetchone()[0]
+    yield seeded_db
+    seeded_db.execute('delete from readings where rowid > ?', (seed_rowid,))
+
+
+@pytest.fixture(scope='session')
+def client():
+    app.config['TESTING'] = True
+
+    # Keep one app context pushed for the whole session, requests made by the client reuse it rather than pushing and
+    # tearing down their own. Connections are still rolled back and returned to the pool by the request teardown
+    with app.app_context():
+        yield app.test_client()
@@ -0,0 +1,7 @@
+# Shared in-memory database the tests run against, the app connects to it through the same URI
+TEST_DB_URI = 'file:sensor_test_db?mode=memory&cache=shared'
+
+DEVICE_UUID = 'test_device'
+# Devices seeded with their own readings for the tests that need a different data set, so no test has to insert rows
+MODE_DEVICE_UUID = 'test_device_mode'
+QUARTILES_DEVICE_UUID = 'test_device_quartiles'
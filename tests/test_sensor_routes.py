@@ -1,357 +1,383 @@
-import json
+import orjson
 import pytest
 import sqlite3
-import time
-import unittest
-
-from app import app
-
-
-class SensorRoutesTestCases(unittest.TestCase):
-
-    def setUp(self):
-        # Setup the SQLite DB
-        conn = sqlite3.connect('test_database.db')
-        conn.execute('DROP TABLE IF EXISTS readings')
-        conn.execute(
-            'CREATE TABLE IF NOT EXISTS readings (device_uuid TEXT, type TEXT, value INTEGER, date_created INTEGER)')
-
-        self.device_uuid = 'test_device'
-
-        # Setup some sensor data
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-
-        # Tests would usually take variable amounts of time to run, so saving a time anchor will come
-        # handy while testing endpoints requiring time ranges
-
-        # Create time anchors
-        time_anchor = int(time.time()) - 100
-        time_anchor_1 = int(time.time()) - 50
-        time_anchor_2 = int(time.time())
-
-        # Add time anchors to test class
-        self.time_anchor = time_anchor
-        self.time_anchor_1 = time_anchor_1
-        self.time_anchor_2 = time_anchor_2
-
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    (self.device_uuid, 'temperature', 22, time_anchor))
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    (self.device_uuid, 'temperature', 50, time_anchor_1))
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    (self.device_uuid, 'humidity', 50, time_anchor_1))
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    (self.device_uuid, 'temperature', 100, time_anchor_2))
-
-        cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                    ('other_uuid', 'temperature', 22, time_anchor_2))
-        conn.commit()
-
-        app.config['TESTING'] = True
-
-        self.client = app.test_client
-
-        # Define test-wide cursor and connection
-        self.cur = cur
-        self.conn = conn
-
-    def test_device_readings_get(self):
-        # Given a device UUID
-        # When we make a request with the given UUID
-        request = self.client().get('/devices/{}/readings/'.format(self.device_uuid))
-
-        # Then we should receive a 200
-        self.assertEqual(request.status_code, 200)
-
-        # And the response data should have four sensor readings
-        self.assertTrue(len(json.loads(request.data)) == 4)
-
-    def test_device_readings_post(self):
-        # Given a device UUID
-        # When we make a request with the given UUID to create a reading
-        request = self.client().post('/devices/{}/readings/'.format(self.device_uuid), data=
-        json.dumps({
-            'type': 'temperature',
-            'value': 100
-        }))
-
-        # Then we should receive a 201
-        self.assertEqual(request.status_code, 201)
-
-        # And when we check for readings in the db
-        self.cur.execute('select * from readings where device_uuid="{}"'.format(self.device_uuid))
-        rows = self.cur.fetchall()
-
-        # We should have five
-        self.assertTrue(len(rows) == 5)
-
-    def test_device_readings_post_validation(self):
-        # Given a device UUID
-        # When we make a request with the given UUID and incorrectly formatted input to create a reading
-
-        # !Todo refactor repetitive code with pytest's fixtures or parametrize methods.
-
-        with self.subTest():
-            # Test for value inputs above threshold
-            request = self.client().post('/devices/{}/readings/'.format(self.device_uuid), data=json.dumps({
-                'type': 'temperature',
-                'value': 130
-            }))
-            # Then we should receive a 400
-            self.assertEqual(request.status_code, 400, 'values above threshold')
-
-        with self.subTest():
-            # Test for negative value inputs ie. values below the threshold
-            request1 = self.client().post('/devices/{}/readings/'.format(self.device_uuid), data=json.dumps({
-                'type': 'temperature',
-                'value': -20
-            }))
-            # Then we should receive a 400
-            self.assertEqual(request1.status_code, 400, 'Values below threshold')
-
-        with self.subTest():
-            # Test for wrong data type - string in this case
-            request2 = self.client().post('/devices/{}/readings/'.format(self.device_uuid), data=json.dumps({
-                'type': 'temperature',
-                'value': 'let me in, pretty please'
-            }))
-            # Then we should receive a 400
-            self.assertEqual(request2.status_code, 400, 'String types')
-
-        with self.subTest():
-            # And when we check for readings in the db
-            self.cur.execute('select * from readings where device_uuid="{}"'.format(self.device_uuid))
-            rows = self.cur.fetchall()
-
-            # We should have four
-            self.assertTrue(len(rows) == 4, 'DB remains unchanged')
-
-    def test_device_readings_get_temperature(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's temperature data only.
-
-        - My remarks:
-        This test also passes if there is no type in the returned reading data.
-        To fix this, we could use `reading.get('type')` in place of `reading['type']`,
-        but this should be fine because our validation ensures all readings should have
-        a sensor type.
-        """
-        response = self.client().get('/devices/{}/readings/?type=temperature'.format(self.device_uuid))
-        response_list = json.loads(response.data)
-
-        # Checks that all device reading types are equal to temperature. This covers 'humidity' or future sensor types
-        has_other_types = any(reading['type'] != 'temperature' for reading in response_list)
-
-        self.assertFalse(has_other_types)
-
-    def test_device_readings_get_humidity(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's humidity data only.
-        """
-        # Given a type query equal to humidity
-        # When we make a request to the readings endpoint with this type
-        response = self.client().get('/devices/{}/readings/?type=humidity'.format(self.device_uuid))
-        response_list = json.loads(response.data)
-
-        # And check that no device reading has a different sensor type. This covers 'temperature' or future
-        # sensor types
-        has_other_types = any(reading['type'] != 'humidity' for reading in response_list)
-
-        # Then we should find no reading with a different sensor type
-        self.assertFalse(has_other_types)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_get_past_dates(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's sensor data over
-        a specific date range. We should only get the readings
-        that were created in this time range.
-
-        - My Remarks:
-        No format was given for time input so I worked with the current epoch state, also under the
-        assumption that the endpoint will be called from a device in kiosk mode. The endpoint could
-        almost trivially be extended to handle datetime conversions if another format is to be supplied.
-        """
-        # Given a type query equal to temperature
-        with self.subTest():
-            # When we make a request to the readings endpoint with a start time
-            response = self.client().get('/devices/{}/readings/?type=temperature?start={}'.format(self.device_uuid,
-                                                                                                  self.time_anchor_1))
-            response_list = json.loads(response.data)
-
-            # and check that date_created for all returned readings are greater or equal to the sent start value
-            is_within_range = all(reading['date_created'] >= self.time_anchor_1 for reading in response_list)
-
-            # Then we should have True
-            self.assertTrue(is_within_range)
-
-        with self.subTest():
-            # When we make a request to the readings endpoint with an end time
-            response = self.client().get('/devices/{}/readings/?type=temperature&end={}'.format(self.device_uuid,
-                                                                                                self.time_anchor_1))
-            response_list = json.loads(response.data)
-
-            # and check that date_created for all returned readings are less or equal to the sent start value
-            is_within_range = all(reading['date_created'] <= self.time_anchor_1 for reading in response_list)
-
-            # Then we should have True
-            self.assertTrue(is_within_range)
-
-        with self.subTest():
-            # When we make a request to the readings endpoint with start and end times
-            response = self.client().get('/devices/{}/readings/?type=temperature&start={}&end={}'.format(
-                self.device_uuid, self.time_anchor_1, self.time_anchor_2))
-            response_list = json.loads(response.data)
-
-            # and check that date_created for all returned readings are between the start and end times, both inclusive
-            is_within_range = all(
-                self.time_anchor_1 <= reading['date_created'] <= self.time_anchor_2 for reading in response_list)
-
-            # Then we should have True
-            self.assertTrue(is_within_range)
-
-    def test_device_readings_min(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's min sensor reading.
-        """
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the min endpoint with this type
-        response = self.client().get('/devices/{}/readings/min/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {"value": 22}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_max(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's max sensor reading.
-        """
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the max endpoint with this type
-        response = self.client().get('/devices/{}/readings/max/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {"value": 100}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_median(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's median sensor reading.
-        """
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the median endpoint with this type
-        response = self.client().get('/devices/{}/readings/median/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {"value": 50}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_mean(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's mean sensor reading value.
-        """
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the mean endpoint with this type
-        response = self.client().get('/devices/{}/readings/mean/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {"value": 57.33}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_mode(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's mode sensor reading value.
-        """
-        # Add one more entry to db to create a clear mode
-        self.cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                         (self.device_uuid, 'temperature', 22, self.time_anchor - 20))
-        self.conn.commit()
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the mode endpoint with this type
-        response = self.client().get('/devices/{}/readings/mode/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {"value": 22}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_quartiles(self):
-        """
-        This test should be implemented. The goal is to test that
-        we are able to query for a device's 1st and 3rd quartile
-        sensor reading value.
-        """
-        # Add one more entry to db
-        self.cur.execute('insert into readings (device_uuid,type,value,date_created) VALUES (?,?,?,?)',
-                         (self.device_uuid, 'temperature', 75, self.time_anchor))
-        self.conn.commit()
-        # Given a device with sensor type - 'temperature'
-        # When we make a request to the median endpoint with this type
-        response = self.client().get('/devices/{}/readings/quartiles/?type=temperature'.format(self.device_uuid))
-        response_dict = json.loads(response.data)
-
-        expected_response = {'quartile_1': 36, 'quartile_3': 87.5}
-
-        # Then we should get a dict having a key-value pair of value, 22
-        self.assertEqual(response_dict, expected_response)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
-
-    def test_device_readings_summary(self):
-        """
-        This tests that when a GET request is made to the summary endpoint a breakdown of device information is sent
-        back.
-        """
-        # When we make a request to the summary endpoint
-        response = self.client().get('/devices/summary/')
-        response_dict = json.loads(response.data)
-
-        other_uuid_summary = [device for device in response_dict if device['device_uuid'] == 'other_uuid'][0]
-
-        expected_response = {
-            "device_type": "temperature",
-            "device_uuid": "other_uuid",
-            "max_reading_value": 22,
-            "mean_reading_value": 22.0,
-            "median_value": 22.0,
-            "number_of_readings": 1,
-            "quartile_1_value": 22.0,
-            "quartile_3_value": 22.0
-          }
-
-        # Then the other_uuid summary returned should equal the expected result
-        self.assertEqual(other_uuid_summary, expected_response)
-
-        # The result should be grouped by sensor types, so we should have 3 items
-        self.assertEqual(len(response_dict), 3)
-        # And get a status code of 200
-        self.assertEqual(response.status_code, 200)
+from operator import itemgetter
+
+from app import connection_pool
+from .constants import DEVICE_UUID, MODE_DEVICE_UUID, QUARTILES_DEVICE_UUID, TEST_DB_URI
+
+# Request URLs and bodies, built once for the whole module
+READINGS_URL = '/devices/{}/readings/'.format(DEVICE_UUID)
+SUMMARY_URL = '/devices/summary/'
+TEMPERATURE_READINGS_URL = READINGS_URL + '?type=temperature'
+HUMIDITY_READINGS_URL = READINGS_URL + '?type=humidity'
+MIN_URL = READINGS_URL + 'min/?type=temperature'
+MAX_URL = READINGS_URL + 'max/?type=temperature'
+MEDIAN_URL = READINGS_URL + 'median/?type=temperature'
+PRESSURE_MAX_URL = READINGS_URL + 'max/?type=pressure'
+MEAN_URL = READINGS_URL + 'mean/?type=temperature'
+MODE_URL = '/devices/{}/readings/mode/?type=temperature'.format(MODE_DEVICE_UUID)
+QUARTILES_URL = '/devices/{}/readings/quartiles/?type=temperature'.format(QUARTILES_DEVICE_UUID)
+STATS_URL = READINGS_URL + 'stats/?type=temperature'
+# Readings posted for a device with no seed data, one of them without a value
+NULL_DEVICE_UUID = 'test_device_null'
+NULL_DEVICE_READINGS_URL = '/devices/{}/readings/'.format(NULL_DEVICE_UUID)
+NULL_DEVICE_STATS_URL = NULL_DEVICE_READINGS_URL + 'stats/?type=temperature'
+NULL_VALUE_READINGS_BODY = b'[{"type": "temperature"}, {"type": "temperature", "value": 5}, ' \
+                           b'{"type": "temperature", "value": 7}, {"type": "temperature", "value": 9}]'
+TEMPERATURE_READING_BODY = b'{"type": "temperature", "value": 100}'
+BATCH_READINGS_BODY = b'[{"type": "temperature", "value": 30}, {"type": "humidity", "value": 40}]'
+INVALID_BATCH_READINGS_BODY = b'[{"type": "temperature", "value": 30}, {"type": "temperature", "value": 130}]'
+
+# Expected metric responses for the seed data
+EXPECTED_MIN = {"value": 22}
+EXPECTED_MAX = {"value": 100}
+EXPECTED_MEDIAN = {"value": 50}
+EXPECTED_MEAN = {"value": 57.33}
+EXPECTED_EMPTY = {"value": None}
+EXPECTED_MODE = {"value": 22}
+EXPECTED_QUARTILES = {'quartile_1': 36, 'quartile_3': 87.5}
+# Expected stats and summary responses for the seed data
+EXPECTED_STATS = {
+    "number_of_readings": 3,
+    "min_reading_value": 22,
+    "max_reading_value": 100,
+    "mean_reading_value": 57.33,
+    "median_value": 50,
+    "quartile_1_value": 36,
+    "quartile_3_value": 75
+}
+EXPECTED_NULL_DEVICE_STATS = {
+    "number_of_readings": 3,
+    "min_reading_value": 5,
+    "max_reading_value": 9,
+    "mean_reading_value": 7.0,
+    "median_value": 7.0,
+    "quartile_1_value": 6.0,
+    "quartile_3_value": 8.0
+}
+EXPECTED_OTHER_UUID_SUMMARY = {
+    "device_type": "temperature",
+    "device_uuid": "other_uuid",
+    "max_reading_value": 22,
+    "mean_reading_value": 22.0,
+    "median_value": 22.0,
+    "number_of_readings": 1,
+    "quartile_1_value": 22.0,
+    "quartile_3_value": 22.0
+}
+
+
+def test_device_readings_get(client):
+    # Given a device UUID
+    # When we make a request with the given UUID
+    request = client.get(READINGS_URL)
+
+    # Then we should receive a 200
+    assert request.status_code == 200
+
+    # And the response data should have four sensor readings
+    assert len(orjson.loads(request.data)) == 4
+
+
+def test_device_readings_post(client, conn):
+    # Given a device UUID
+    # When we make a request with the given UUID to create a reading
+    request = client.post(READINGS_URL, data=TEMPERATURE_READING_BODY)
+
+    # Then we should receive a 201
+    assert request.status_code == 201
+
+    # And when we check for readings in the db
+    count = conn.execute('select count(*) from readings where device_uuid=?', (DEVICE_UUID,)).fetchone()[0]
+
+    # We should have five
+    assert count == 5
+
+
+def test_device_readings_post_batch(client, conn):
+    # Given a device UUID
+    # When we make a request with the given UUID to create a list of readings
+    request = client.post(READINGS_URL, data=BATCH_READINGS_BODY)
+
+    # Then we should receive a 201
+    assert request.status_code == 201
+
+    # And when we check for readings in the db
+    count = conn.execute('select count(*) from readings where device_uuid=?', (DEVICE_UUID,)).fetchone()[0]
+
+    # We should have six
+    assert count == 6
+
+
+def test_device_readings_post_batch_validation(client, conn):
+    # Given a device UUID
+    # When we make a request with a list of readings where one of them is invalid
+    request = client.post(READINGS_URL, data=INVALID_BATCH_READINGS_BODY)
+
+    # Then we should receive a 400
+    assert request.status_code == 400
+
+    # And none of the readings should have been saved
+    count = conn.execute('select count(*) from readings where device_uuid=?', (DEVICE_UUID,)).fetchone()[0]
+    assert count == 4
+
+
+def test_device_readings_post_rollback(client, conn, monkeypatch):
+    # Given an insert that fails once the transaction has been opened
+    monkeypatch.setattr('app.INSERT_READING_QUERY', 'insert into missing_readings VALUES (?,?,?,?)')
+
+    # When we make a request to create a reading
+    with pytest.raises(sqlite3.OperationalError):
+        client.post(READINGS_URL, data=TEMPERATURE_READING_BODY)
+
+    # Then the writer connection should be back in the pool with its transaction rolled back
+    writer = connection_pool(TEST_DB_URI, False).get_nowait()
+    connection_pool(TEST_DB_URI, False).put(writer)
+    assert not writer.in_transaction
+
+    # And none of the readings should have been saved
+    count = conn.execute('select count(*) from readings where device_uuid=?', (DEVICE_UUID,)).fetchone()[0]
+    assert count == 4
+
+
+@pytest.mark.parametrize('data', [
+    # Test for value inputs above threshold
+    b'{"type": "temperature", "value": 130}',
+    # Test for negative value inputs ie. values below the threshold
+    b'{"type": "temperature", "value": -20}',
+    # Test for wrong data type - string in this case
+    b'{"type": "temperature", "value": "let me in, pretty please"}',
+    # Test for a body that is not valid JSON
+    b'{"type": ',
+], ids=['above threshold', 'below threshold', 'string value', 'malformed JSON'])
+def test_device_readings_post_validation(client, conn, data):
+    # Given a device UUID
+    # When we make a request with the given UUID and incorrectly formatted input to create a reading
+    request = client.post(READINGS_URL, data=data)
+
+    # Then we should receive a 400
+    assert request.status_code == 400
+
+    # And when we check for readings in the db
+    count = conn.execute('select count(*) from readings where device_uuid=?', (DEVICE_UUID,)).fetchone()[0]
+
+    # We should have four ie. the DB remains unchanged
+    assert count == 4
+
+
+def test_device_readings_get_interleaved(client, monkeypatch):
+    # Given empty connection pools and a readings response streamed one row at a time
+    monkeypatch.setattr('app._pools', {})
+    monkeypatch.setattr('app.FETCH_SIZE', 1)
+    pool = connection_pool(TEST_DB_URI, True)
+
+    # When we start reading the readings response
+    stream = client.get(READINGS_URL, buffered=False)
+    chunks = iter(stream.response)
+    body = next(chunks) + next(chunks)
+
+    # Then its connection should stay checked out while the response is sent
+    assert pool.qsize() == 0
+
+    # And a request made meanwhile should get a connection of its own
+    response = client.get(MAX_URL)
+    assert orjson.loads(response.data) == EXPECTED_MAX
+    assert pool.qsize() == 1
+
+    # And once the response is read and closed, its connection should be back in the pool
+    body += b''.join(chunks)
+    stream.close()
+    assert len(orjson.loads(body)) == 4
+    assert pool.qsize() == 2
+
+
+def test_device_readings_get_temperature(client):
+    """
+    This test should be implemented. The goal is to test that
+    we are able to query for a device's temperature data only.
+
+    - My remarks:
+    This test also passes if there is no type in the returned reading data.
+    To fix this, we could use `reading.get('type')` in place of `reading['type']`,
+    but this should be fine because our validation ensures all readings should have
+    a sensor type.
+    """
+    response = client.get(TEMPERATURE_READINGS_URL)
+    response_list = orjson.loads(response.data)
+
+    # Checks that all device reading types are equal to temperature. This covers 'humidity' or future sensor types
+    reading_types = set(map(itemgetter('type'), response_list))
+
+    assert reading_types <= {'temperature'}
+
+
+def test_device_readings_get_humidity(client):
+    """
+    This test should be implemented. The goal is to test that
+    we are able to query for a device's humidity data only.
+    """
+    # Given a type query equal to humidity
+    # When we make a request to the readings endpoint with this type
+    response = client.get(HUMIDITY_READINGS_URL)
+    response_list = orjson.loads(response.data)
+
+    # And check that no device reading has a different sensor type. This covers 'temperature' or future
+    # sensor types
+    reading_types = set(map(itemgetter('type'), response_list))
+
+    # Then we should find no reading with a different sensor type
+    assert reading_types <= {'humidity'}
+    # And get a status code of 200
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('query_template, start_anchor, end_anchor, expected_count', [
+    # With a start time
+    ('?type=temperature&start={start}', 'time_anchor_1', None, 2),
+    # With an end time
+    ('?type=temperature&end={end}', None, 'time_anchor_1', 2),
+    # With start and end times
+    ('?type=temperature&start={start}&end={end}', 'time_anchor_1', 'time_anchor_2', 2),
+], ids=['start', 'end', 'start and end'])
+def test_device_readings_get_past_dates(client, anchors, query_template, start_anchor, end_anchor, expected_count):
+    """
+    This test should be implemented. The goal is to test that
+    we are able to query for a device's sensor data over
+    a specific date range. We should only get the readings
+    that were created in this time range.
+
+    - My Remarks:
+    No format was given for time input so I worked with the current epoch state, also under the
+    assumption that the endpoint will be called from a device in kiosk mode. The endpoint could
+    almost trivially be extended to handle datetime conversions if another format is to be supplied.
+    """
+    start = getattr(anchors, start_anchor) if start_anchor else None
+    end = getattr(anchors, end_anchor) if end_anchor else None
+
+    # Given a type query equal to temperature
+    # When we make a request to the readings endpoint with the start and/or end times
+    response = client.get(READINGS_URL + query_template.format(start=start, end=end))
+    response_list = orjson.loads(response.data)
+
+    # Then we should get a status code of 200
+    assert response.status_code == 200
+    # And only the temperature readings created in the range
+    assert len(response_list) == expected_count
+
+    # and check that date_created for all returned readings are within the sent times, both inclusive
+    dates = list(map(itemgetter('date_created'), response_list))
+    is_within_range = (start is None or min(dates) >= start) and (end is None or max(dates) <= end)
+
+    # And we should have True
+    assert is_within_range
+
+
+@pytest.mark.parametrize('url, expected', [
+    (MIN_URL, EXPECTED_MIN),
+    (MAX_URL, EXPECTED_MAX),
+    (MEDIAN_URL, EXPECTED_MEDIAN),
+    (MEAN_URL, EXPECTED_MEAN),
+    (MODE_URL, EXPECTED_MODE),
+], ids=['min', 'max', 'median', 'mean', 'mode'])
+def test_device_readings_single_metric(client, url, expected):
+    """
+    This tests that we are able to query for a device's min, max, median, mean and mode sensor reading values.
+    """
+    # Given a device with sensor type - 'temperature'
+    # When we make a request to the metric endpoint with this type
+    response = client.get(url)
+    response_dict = orjson.loads(response.data)
+
+    # Then we should get a dict having the expected value
+    assert response_dict == expected
+    # And get a status code of 200
+    assert response.status_code == 200
+
+
+def test_device_readings_metric_empty(client):
+    """
+    This tests that metric endpoints return null when a device has no readings of the requested type.
+    """
+    # Given a sensor type the device has no readings for
+    # When we make a request to the max endpoint with this type
+    response = client.get(PRESSURE_MAX_URL)
+    response_dict = orjson.loads(response.data)
+
+    # Then we should get a null value
+    assert response_dict == EXPECTED_EMPTY
+    # And get a status code of 200
+    assert response.status_code == 200
+
+
+def test_device_readings_quartiles(client):
+    """
+    This test should be implemented. The goal is to test that
+    we are able to query for a device's 1st and 3rd quartile
+    sensor reading value.
+    """
+    # Given a device with four readings of sensor type - 'temperature'
+    # When we make a request to the median endpoint with this type
+    response = client.get(QUARTILES_URL)
+    response_dict = orjson.loads(response.data)
+
+    # Then we should get a dict having a key-value pair of value, 22
+    assert response_dict == EXPECTED_QUARTILES
+    # And get a status code of 200
+    assert response.status_code == 200
+
+
+def test_device_readings_stats(client):
+    """
+    This tests that we are able to query for all of a device's sensor reading statistics at once.
+    """
+    # Given a device with sensor type - 'temperature'
+    # When we make a request to the stats endpoint with this type
+    response = client.get(STATS_URL)
+    response_dict = orjson.loads(response.data)
+
+    # Then we should get the same values as the individual metric endpoints
+    assert response_dict == EXPECTED_STATS
+    # And get a status code of 200
+    assert response.status_code == 200
+
+
+def test_device_readings_stats_null_values(client):
+    """
+    This tests that readings posted without a value are left out of the statistics.
+    """
+    # Given a device with a reading that has no value
+    client.post(NULL_DEVICE_READINGS_URL, data=NULL_VALUE_READINGS_BODY)
+
+    # When we make a request to the stats endpoint
+    response = client.get(NULL_DEVICE_STATS_URL)
+
+    # Then the statistics should only cover the readings with a value
+    assert orjson.loads(response.data) == EXPECTED_NULL_DEVICE_STATS
+
+    # And so should the device's summary
+    summary = [device for device in orjson.loads(client.get(SUMMARY_URL).data)
+               if device['device_uuid'] == NULL_DEVICE_UUID][0]
+    assert summary['number_of_readings'] == 3
+    assert summary['median_value'] == 7.0
+    assert (summary['quartile_1_value'], summary['quartile_3_value']) == (6.0, 8.0)
+
+
+def test_device_readings_summary(client):
+    """
+    This tests that when a GET request is made to the summary endpoint a breakdown of device information is sent
+    back.
+    """
+    # When we make a request to the summary endpoint
+    response = client.get(SUMMARY_URL)
+    response_dict = orjson.loads(response.data)
+
+    other_uuid_summary = [device for device in response_dict if device['device_uuid'] == 'other_uuid'][0]
+
+    # Then the other_uuid summary returned should equal the expected result
+    assert other_uuid_summary == EXPECTED_OTHER_UUID_SUMMARY
+
+    # The result should be grouped by device and sensor type, so we should have 5 items
+    assert len(response_dict) == 5
+    # And get a status code of 200
+    assert response.status_code == 200